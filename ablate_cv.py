@@ -1,18 +1,12 @@
-import pandas as pd
-from sklearn.model_selection import StratifiedKFold, cross_val_score
+import numpy as np
+from sklearn.model_selection import StratifiedKFold, cross_validate
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import StandardScaler
 from sklearn.linear_model import LogisticRegression
 
-df = pd.read_csv(r"out\teams_plus_more.csv")
+from dataset_io import add_team_deltas, downcast, load_dataset
 
-def delta(col_suffix: str, minute: int):
-    return df[f"t100_team_m{minute}_{col_suffix}"] - df[f"t200_team_m{minute}_{col_suffix}"]
-
-df["d10_cs"]  = delta("cs", 10)
-df["d15_cs"]  = delta("cs", 15)
-df["d10_lvl"] = delta("levelSum", 10)
-df["d15_lvl"] = delta("levelSum", 15)
+df = add_team_deltas(downcast(load_dataset("out/teams_plus_more.parquet")))
 
 base_feats = [
     "delta_m10_gold_100_minus_200",
@@ -44,19 +38,28 @@ more_feats = [
 
 y = df["team100_win"].astype(int)
 
+# všechny sady jsou podmnožiny téhle -> jedna float32 matice a jedna NaN maska předem
+all_feats = base_feats + obj_feats + more_feats
+Xall = np.ascontiguousarray(df[all_feats].to_numpy(dtype=np.float32))
+nan_all = np.isnan(Xall)
+y_all = y.to_numpy()
+
 cv = StratifiedKFold(n_splits=5, shuffle=True, random_state=42)
 model = Pipeline([
     ("scaler", StandardScaler()),
-    ("clf", LogisticRegression(max_iter=5000, C=1.0))
+    ("clf", LogisticRegression(solver="liblinear", C=1.0, tol=1e-3, max_iter=200))
 ])
 
 def run(name, feats):
-    X = df[feats].copy()
-    mask = ~X.isna().any(axis=1)
-    X = X[mask]
-    yy = y[mask]
-    auc = cross_val_score(model, X, yy, cv=cv, scoring="roc_auc")
-    acc = cross_val_score(model, X, yy, cv=cv, scoring="accuracy")
+    col_idx = [all_feats.index(c) for c in feats]
+    # NaN filtr jen přes sloupce dané sady (OBJ only tak nepřijde o řádky bez snapshotů)
+    mask = ~nan_all[:, col_idx].any(axis=1)
+    X = Xall[np.ix_(mask, col_idx)]
+    yy = y_all[mask]
+    # jeden fit na fold, obě metriky z něj; foldy paralelně
+    res = cross_validate(model, X, yy, cv=cv, scoring=["roc_auc", "accuracy"], n_jobs=-1)
+    auc = res["test_roc_auc"]
+    acc = res["test_accuracy"]
     print(f"\n{name}  rows={len(X)} feats={len(feats)}")
     print(f"ROC AUC: {auc.mean():.4f} ± {auc.std():.4f}")
     print(f"ACC:     {acc.mean():.4f} ± {acc.std():.4f}")
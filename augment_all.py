@@ -0,0 +1,41 @@
+import argparse
+from pathlib import Path
+import pandas as pd
+
+import augment_champ_roles
+import augment_more
+import augment_objectives
+from cache_timelines import cached_match_ids, load_cache
+from dataset_io import attach_by_key, match_key_col, write_table
+
+# objectives + more + champ roles v jednom běhu: JSONy se parsují jednou (cache_timelines),
+# výsledek je rovnou teams_full.parquet bez mezikroků teams_plus / teams_plus_more.
+# Jednotlivé augment_*.py skripty fungují dál, pokud je potřeba jen jeden krok.
+
+OUT_DIR = Path(r"out")
+OUT_FULL = OUT_DIR / "teams_full.parquet"
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--csv", action="store_true", help="Also write a CSV copy next to each Parquet output")
+    args = ap.parse_args()
+
+    events, snaps, roles = load_cache()
+    match_ids = cached_match_ids(snaps)
+
+    parts = [
+        augment_objectives.compute_features(events, match_ids),
+        augment_more.compute_features(events, snaps),
+        augment_champ_roles.compute_features(roles, match_ids),
+    ]
+    feats = pd.concat([p.set_index("match_id") for p in parts], axis=1).rename_axis("match_id").reset_index()
+
+    teams = pd.read_parquet(OUT_DIR / "teams.parquet")
+    key_col = match_key_col(teams, "teams.parquet")
+
+    full = attach_by_key(teams, feats, key_col)
+    write_table(full, OUT_FULL, csv=args.csv)
+    print(f"written: {OUT_FULL} rows={len(full)} cols={len(full.columns)}")
+
+if __name__ == "__main__":
+    main()
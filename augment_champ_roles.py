@@ -1,57 +1,42 @@
-import json
+import argparse
 from pathlib import Path
 import pandas as pd
 
-MATCH_DIR = Path(r"match")
-OUT_CH = Path(r"out\champ_roles.csv")
-OUT_FULL = Path(r"out\teams_full.csv")
+from cache_timelines import ROLES, cached_match_ids, load_cache
+from dataset_io import attach_by_key, match_key_col, write_table
 
-ROLES = ["TOP","JUNGLE","MIDDLE","BOTTOM","UTILITY"]
+OUT_DIR = Path(r"out")
+OUT_CH = OUT_DIR / "champ_roles.parquet"
+OUT_FULL = OUT_DIR / "teams_full.parquet"
 
-def load_json(p: Path):
-    with p.open("r", encoding="utf-8") as f:
-        return json.load(f)
+def compute_features(roles: pd.DataFrame, match_ids):
+    # roles = roles.parquet (match_id, tid, role, champ), jen hráči s platnou rolí
+    # první výskyt ber (aggfunc="first" drží pořadí participants)
+    wide = roles.pivot_table(index="match_id", columns=["tid", "role"], values="champ", aggfunc="first")
+
+    # zápasy bez jediného platného hráče / chybějící role -> NaN, pevné pořadí sloupců
+    cols = [(tid, r) for tid in (100, 200) for r in ROLES]
+    wide = wide.reindex(index=match_ids, columns=cols)
+    wide.columns = [f"t{tid}_{r}_champ" for tid, r in cols]
+    return wide.rename_axis("match_id").reset_index()
 
 def main():
-    rows = []
-    for m_path in sorted(MATCH_DIR.glob("*.json")):
-        match_id = m_path.stem
-        mj = load_json(m_path)
-        parts = mj.get("info", {}).get("participants", [])
-
-        row = {"match_id": match_id}
-        # init
-        for tid in (100, 200):
-            for r in ROLES:
-                row[f"t{tid}_{r}_champ"] = None
-
-        for p in parts:
-            tid = p.get("teamId")
-            role = p.get("teamPosition")  # TOP/JUNGLE/MIDDLE/BOTTOM/UTILITY
-            champ = p.get("championId")
-            if tid in (100, 200) and role in ROLES and champ is not None:
-                key = f"t{tid}_{role}_champ"
-                if row[key] is None:  # první výskyt ber
-                    row[key] = int(champ)
-
-        rows.append(row)
-
-    ch = pd.DataFrame(rows).sort_values("match_id")
-    ch.to_csv(OUT_CH, index=False)
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--csv", action="store_true", help="Also write a CSV copy next to each Parquet output")
+    args = ap.parse_args()
+
+    _, snaps, roles = load_cache()
+
+    ch = compute_features(roles, cached_match_ids(snaps)).sort_values("match_id")
+    write_table(ch, OUT_CH, csv=args.csv)
     print(f"written: {OUT_CH} rows={len(ch)} cols={len(ch.columns)}")
 
-    base = pd.read_csv(r"out\teams_plus_more.csv")
-    key = None
-    for c in base.columns:
-        if c.lower() in {"match_id", "matchid"}:
-            key = c
-            break
-    if key is None:
-        raise SystemExit("teams_plus_more.csv: chybí sloupec match_id/matchId")
-
-    full = base.merge(ch, left_on=key, right_on="match_id", how="left")
-    full.to_csv(OUT_FULL, index=False)
+    base = pd.read_parquet(OUT_DIR / "teams_plus_more.parquet")
+    key = match_key_col(base, "teams_plus_more.parquet")
+
+    full = attach_by_key(base, ch, key)
+    write_table(full, OUT_FULL, csv=args.csv)
     print(f"written: {OUT_FULL} rows={len(full)} cols={len(full.columns)}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,23 +1,117 @@
+import argparse
 import os
-import json
+try:
+    import orjson as json  # rychlejší parser, vrací stejné dict/list struktury
+except ImportError:
+    import json
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 from tqdm import tqdm
 
+from dataset_io import write_table
+
 
 MATCH_DIR = Path("match")
 TL_DIR = Path("timeline")
 OUT_DIR = Path("out")
 OUT_DIR.mkdir(exist_ok=True)
+# zúžené kopie JSONů (jen pole, která build_match čte); plné Riot JSONy jsou z většiny challenges apod.
+SLIM_DIR = OUT_DIR / "slim"
 
 # chceme snapshoty z timeline v minutě 10 a 15 (index frame = minute)
 SNAP_MINUTES = [10, 15]
 
+# pevné schéma teams.csv -> řádky se plní rovnou do předalokovaného structured array;
+# match info pole můžou v JSONu chybět -> f8 (NaN) / object (None), ne 0 a "" jako skutečná hodnota
+TEAM_DTYPE = [
+    ("matchId", "U40"),
+    ("gameCreation", "f8"),
+    ("gameDuration", "f8"),
+    ("gameVersion", "O"),
+    ("queueId", "f8"),
+    ("mapId", "f8"),
+    ("platformId", "O"),
+]
+for _m in SNAP_MINUTES:
+    for _t in (100, 200):
+        TEAM_DTYPE += [
+            (f"t{_t}_team_m{_m}_{k}", "f8")  # NaN, když frame v minutě chybí
+            for k in ("totalGold", "xp", "cs", "levelSum", "participants_ok")
+        ]
+    TEAM_DTYPE += [
+        (f"delta_m{_m}_gold_100_minus_200", "f8"),
+        (f"delta_m{_m}_xp_100_minus_200", "f8"),
+    ]
+TEAM_DTYPE += [("team100_win", "i1"), ("team200_win", "i1")]
+
+# win sloupce chybět nemůžou (zápas bez výsledku se přeskočí), matchId má fallback na jméno souboru
+TEAM_DEFAULTS = {name: np.nan if kind.startswith("f") else None for name, kind in TEAM_DTYPE}
+
+
+MATCH_INFO_FIELDS = ("gameCreation", "gameDuration", "gameVersion", "queueId", "mapId", "platformId")
+PARTICIPANT_FIELDS = (
+    "puuid", "riotIdGameName", "riotIdTagline", "teamId", "participantId",
+    "championId", "championName", "teamPosition", "lane", "role", "individualPosition",
+    "summoner1Id", "summoner2Id",
+    "kills", "deaths", "assists", "totalDamageDealtToChampions", "goldEarned",
+    "totalMinionsKilled", "neutralMinionsKilled", "win",
+)
+FRAME_FIELDS = ("totalGold", "xp", "level", "minionsKilled", "jungleMinionsKilled", "currentGold")
+
+# změna seznamů polí výš -> slim kopie se přegenerují
+_SCRIPT_MTIME = Path(__file__).stat().st_mtime
+
 
 def load_json(path: Path):
-    with path.open("r", encoding="utf-8") as f:
-        return json.load(f)
+    return json.loads(path.read_bytes())
+
+
+def pick(d: dict, fields):
+    # chybějící klíče nepřidávat, ať .get() dál vrací None jako u plného JSONu
+    return {k: d[k] for k in fields if k in d}
+
+
+def slim_match(match: dict):
+    info = match.get("info", {})
+    slim_info = pick(info, MATCH_INFO_FIELDS)
+    slim_info["participants"] = [pick(p, PARTICIPANT_FIELDS) for p in info.get("participants", [])]
+    slim_info["teams"] = [pick(t, ("teamId", "win")) for t in info.get("teams", [])]
+    return {"metadata": pick(match.get("metadata", {}), ("matchId",)), "info": slim_info}
+
+
+def slim_timeline(tl: dict):
+    # build_match čte jen participantFrames, eventy se zahazují
+    frames = [
+        {"participantFrames": {pid: pick(x, FRAME_FIELDS) for pid, x in fr.get("participantFrames", {}).items()}}
+        for fr in tl.get("info", {}).get("frames", [])
+    ]
+    return {"info": {"frames": frames}}
+
+
+def load_slim(path: Path, kind: str, slim):
+    slim_path = SLIM_DIR / kind / path.name
+    if slim_path.exists():
+        mtime = slim_path.stat().st_mtime
+        if mtime >= path.stat().st_mtime and mtime >= _SCRIPT_MTIME:
+            return load_json(slim_path)
+
+    data = slim(load_json(path))
+    raw = json.dumps(data)  # orjson vrací bytes, json str
+    tmp = slim_path.with_suffix(".tmp")
+    tmp.write_bytes(raw if isinstance(raw, bytes) else raw.encode("utf-8"))
+    os.replace(tmp, slim_path)
+    return data
+
+
+def load_json_match_slim(path: Path):
+    return load_slim(path, "match", slim_match)
+
+
+def load_json_timeline_slim(path: Path):
+    return load_slim(path, "timeline", slim_timeline)
 
 
 def get_frame(tl: dict, minute: int):
@@ -94,123 +188,152 @@ def extract_team_snapshot(tl: dict, minute: int, team_participant_ids: list[int]
     }
 
 
-def main():
-    match_files = sorted(MATCH_DIR.glob("*.json"))
-    rows = []
-    team_rows = []
+def build_match(mp: Path):
+    # jeden zápas -> (team row, participant rows); None pokud se nedá použít
+    match = load_json_match_slim(mp)
 
-    for mp in tqdm(match_files, desc="building"):
-        match = load_json(mp)
+    info = match.get("info", {})
+    metadata = match.get("metadata", {})
+    match_id = metadata.get("matchId") or mp.stem
 
-        info = match.get("info", {})
-        metadata = match.get("metadata", {})
-        match_id = metadata.get("matchId") or mp.stem
+    tl_path = TL_DIR / f"{mp.stem}.json"
+    if not tl_path.exists():
+        # dataset je spárovaný, ale necháme fallback
+        return None
+    tl = load_json_timeline_slim(tl_path)
+
+    # match-level
+    base_match = {
+        "matchId": match_id,
+        "gameCreation": info.get("gameCreation"),
+        "gameDuration": info.get("gameDuration"),
+        "gameVersion": info.get("gameVersion"),
+        "queueId": info.get("queueId"),
+        "mapId": info.get("mapId"),
+        "platformId": info.get("platformId"),
+    }
 
-        tl_path = TL_DIR / f"{mp.stem}.json"
-        if not tl_path.exists():
-            # dataset je spárovaný, ale necháme fallback
-            continue
-        tl = load_json(tl_path)
-
-        # match-level
-        base_match = {
-            "matchId": match_id,
-            "gameCreation": info.get("gameCreation"),
-            "gameDuration": info.get("gameDuration"),
-            "gameVersion": info.get("gameVersion"),
-            "queueId": info.get("queueId"),
-            "mapId": info.get("mapId"),
-            "platformId": info.get("platformId"),
-        }
-
-        participants = info.get("participants", [])
-        if len(participants) != 10:
-            continue
+    participants = info.get("participants", [])
+    if len(participants) != 10:
+        return None
 
-        # team participantId seznamy (pro týmové agregace)
-        team100 = [p.get("participantId") for p in participants if p.get("teamId") == 100]
-        team200 = [p.get("participantId") for p in participants if p.get("teamId") == 200]
+    # team participantId seznamy (pro týmové agregace)
+    team100 = [p.get("participantId") for p in participants if p.get("teamId") == 100]
+    team200 = [p.get("participantId") for p in participants if p.get("teamId") == 200]
+
+    # týmové snapshoty + delty
+    team_base = dict(base_match)
+    for m in SNAP_MINUTES:
+        s100 = extract_team_snapshot(tl, m, team100)
+        s200 = extract_team_snapshot(tl, m, team200)
+        for k, v in s100.items():
+            team_base[f"t100_{k}"] = v
+        for k, v in s200.items():
+            team_base[f"t200_{k}"] = v
+
+        # delta jen pokud máme obě strany
+        g100 = s100.get(f"team_m{m}_totalGold")
+        g200 = s200.get(f"team_m{m}_totalGold")
+        if g100 is not None and g200 is not None:
+            team_base[f"delta_m{m}_gold_100_minus_200"] = g100 - g200
+
+        xp100 = s100.get(f"team_m{m}_xp")
+        xp200 = s200.get(f"team_m{m}_xp")
+        if xp100 is not None and xp200 is not None:
+            team_base[f"delta_m{m}_xp_100_minus_200"] = xp100 - xp200
+
+    # win label po týmech (z participants/teams)
+    teams = info.get("teams", [])
+    win100 = None
+    win200 = None
+    for t in teams:
+        if t.get("teamId") == 100:
+            win100 = 1 if t.get("win") else 0
+        if t.get("teamId") == 200:
+            win200 = 1 if t.get("win") else 0
+    if win100 is None or win200 is None:
+        # bez výsledku nejde zápas olabelovat
+        return None
+    team_base["team100_win"] = win100
+    team_base["team200_win"] = win200
 
-        # týmové snapshoty + delty
-        team_base = dict(base_match)
+    # participant rows
+    rows = []
+    for p in participants:
+        pid = p.get("participantId")
+        row = dict(base_match)
+
+        row.update({
+            "puuid": p.get("puuid"),
+            "riotIdGameName": p.get("riotIdGameName"),
+            "riotIdTagline": p.get("riotIdTagline"),
+            "teamId": p.get("teamId"),
+            "participantId": pid,
+
+            "championId": p.get("championId"),
+            "championName": p.get("championName"),
+            "teamPosition": p.get("teamPosition"),
+            "lane": p.get("lane"),
+            "role": p.get("role"),
+            "individualPosition": p.get("individualPosition"),
+
+            "summoner1Id": p.get("summoner1Id"),
+            "summoner2Id": p.get("summoner2Id"),
+
+            # end-of-game (užitečné na sanity checks; do predikce win to nepoužívej)
+            "kills": p.get("kills"),
+            "deaths": p.get("deaths"),
+            "assists": p.get("assists"),
+            "totalDamageDealtToChampions": p.get("totalDamageDealtToChampions"),
+            "goldEarned": p.get("goldEarned"),
+            "totalMinionsKilled": p.get("totalMinionsKilled"),
+            "neutralMinionsKilled": p.get("neutralMinionsKilled"),
+            "win": 1 if p.get("win") else 0,
+        })
+
+        # timeline snapshoty
         for m in SNAP_MINUTES:
-            s100 = extract_team_snapshot(tl, m, team100)
-            s200 = extract_team_snapshot(tl, m, team200)
-            for k, v in s100.items():
-                team_base[f"t100_{k}"] = v
-            for k, v in s200.items():
-                team_base[f"t200_{k}"] = v
-
-            # delta jen pokud máme obě strany
-            g100 = s100.get(f"team_m{m}_totalGold")
-            g200 = s200.get(f"team_m{m}_totalGold")
-            if g100 is not None and g200 is not None:
-                team_base[f"delta_m{m}_gold_100_minus_200"] = g100 - g200
-
-            xp100 = s100.get(f"team_m{m}_xp")
-            xp200 = s200.get(f"team_m{m}_xp")
-            if xp100 is not None and xp200 is not None:
-                team_base[f"delta_m{m}_xp_100_minus_200"] = xp100 - xp200
-
-        # win label po týmech (z participants/teams)
-        teams = info.get("teams", [])
-        win100 = None
-        win200 = None
-        for t in teams:
-            if t.get("teamId") == 100:
-                win100 = 1 if t.get("win") else 0
-            if t.get("teamId") == 200:
-                win200 = 1 if t.get("win") else 0
-        team_base["team100_win"] = win100
-        team_base["team200_win"] = win200
-        team_rows.append(team_base)
-
-        # participant rows
-        for p in participants:
-            pid = p.get("participantId")
-            row = dict(base_match)
-
-            row.update({
-                "puuid": p.get("puuid"),
-                "riotIdGameName": p.get("riotIdGameName"),
-                "riotIdTagline": p.get("riotIdTagline"),
-                "teamId": p.get("teamId"),
-                "participantId": pid,
-
-                "championId": p.get("championId"),
-                "championName": p.get("championName"),
-                "teamPosition": p.get("teamPosition"),
-                "lane": p.get("lane"),
-                "role": p.get("role"),
-                "individualPosition": p.get("individualPosition"),
-
-                "summoner1Id": p.get("summoner1Id"),
-                "summoner2Id": p.get("summoner2Id"),
-
-                # end-of-game (užitečné na sanity checks; do predikce win to nepoužívej)
-                "kills": p.get("kills"),
-                "deaths": p.get("deaths"),
-                "assists": p.get("assists"),
-                "totalDamageDealtToChampions": p.get("totalDamageDealtToChampions"),
-                "goldEarned": p.get("goldEarned"),
-                "totalMinionsKilled": p.get("totalMinionsKilled"),
-                "neutralMinionsKilled": p.get("neutralMinionsKilled"),
-                "win": 1 if p.get("win") else 0,
-            })
-
-            # timeline snapshoty
-            for m in SNAP_MINUTES:
-                row.update(extract_participant_snapshot(tl, m, pid))
-
-            rows.append(row)
+            row.update(extract_participant_snapshot(tl, m, pid))
+
+        rows.append(row)
+
+    team_row = tuple(
+        v if (v := team_base.get(name)) is not None else TEAM_DEFAULTS[name]
+        for name, _ in TEAM_DTYPE
+    )
+    return team_row, rows
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--csv", action="store_true", help="Also write a CSV copy next to each Parquet output")
+    args = ap.parse_args()
+
+    match_files = sorted(MATCH_DIR.glob("*.json"))
+    for kind in ("match", "timeline"):
+        (SLIM_DIR / kind).mkdir(parents=True, exist_ok=True)
+    rows = []
+    team_arr = np.empty(len(match_files), dtype=TEAM_DTYPE)
+    n_teams = 0
+
+    # zápasy jsou nezávislé -> parsování JSON běží paralelně, skládání na hlavním procesu
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as ex:
+        results = ex.map(build_match, match_files, chunksize=32)
+        for res in tqdm(results, total=len(match_files), desc="building"):
+            if res is None:
+                continue
+            team_row, participant_rows = res
+            team_arr[n_teams] = team_row
+            n_teams += 1
+            rows.extend(participant_rows)
 
     dfp = pd.DataFrame(rows)
-    dft = pd.DataFrame(team_rows)
+    dft = pd.DataFrame(team_arr[:n_teams])
 
-    out_p = OUT_DIR / "participants.csv"
-    out_t = OUT_DIR / "teams.csv"
-    dfp.to_csv(out_p, index=False, encoding="utf-8")
-    dft.to_csv(out_t, index=False, encoding="utf-8")
+    out_p = OUT_DIR / "participants.parquet"
+    out_t = OUT_DIR / "teams.parquet"
+    write_table(dfp, out_p, csv=args.csv)
+    write_table(dft, out_t, csv=args.csv)
 
     print(f"written: {out_p} rows={len(dfp)} cols={len(dfp.columns)}")
     print(f"written: {out_t} rows={len(dft)} cols={len(dft.columns)}")
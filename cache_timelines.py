@@ -0,0 +1,244 @@
+import os
+try:
+    import orjson as json
+except ImportError:
+    import json
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+from dataset_io import write_table
+
+# Jednorázový průchod přes match/timeline JSONy -> out/events.parquet, out/snapshots.parquet
+# a out/roles.parquet. augment_* skripty pak čtou jen tyhle tabulky místo opakovaného parsování JSONů.
+
+MATCH_DIR = Path(r"match")
+TL_DIR    = Path(r"timeline")
+OUT_DIR   = Path(r"out")
+
+EVENTS_PATH = OUT_DIR / "events.parquet"
+SNAPS_PATH  = OUT_DIR / "snapshots.parquet"
+ROLES_PATH  = OUT_DIR / "roles.parquet"
+CACHE_PATHS = (EVENTS_PATH, SNAPS_PATH, ROLES_PATH)
+
+CUT15 = 15 * 60 * 1000
+
+# minuty, pro které držíme týmové součty z participantFrames
+SNAP_MINUTES = [8, 12]
+
+# eventy, které augment skripty reálně používají -> int kód v events.parquet
+EVENT_CODES = {
+    "CHAMPION_KILL": 1,
+    "TURRET_PLATE_DESTROYED": 2,
+    "BUILDING_KILL": 3,
+    "ELITE_MONSTER_KILL": 4,
+    "WARD_PLACED": 5,
+    "WARD_KILL": 6,
+}
+# 0 = jiné / chybí
+WARD_CODES = {"YELLOW_TRINKET": 1, "CONTROL_WARD": 2, "SIGHT_WARD": 3, "BLUE_TRINKET": 4, "TEEMO_MUSHROOM": 5}
+MONSTER_CODES = {"DRAGON": 1, "RIFTHERALD": 2, "BARON_NASHOR": 3, "HORDE": 4, "ATAKHAN": 5}
+BUILDING_CODES = {"TOWER_BUILDING": 1, "INHIBITOR_BUILDING": 2}
+
+# team = tým aktéra (killer, u WARD_PLACED creator), 0 = neznámý
+EVENT_COLS = [
+    "match_id", "ts", "type", "team", "victim_team", "assists100", "assists200",
+    "ward_type", "monster_type", "building_type",
+]
+EVENT_DTYPES = {
+    "ts": "int32", "type": "int8", "team": "int16", "victim_team": "int16",
+    "assists100": "int8", "assists200": "int8",
+    "ward_type": "int8", "monster_type": "int8", "building_type": "int8",
+}
+SNAP_COLS = ["match_id", "minute", "team", "gold", "xp", "cs", "lvl"]
+ROLE_COLS = ["match_id", "tid", "role", "champ"]
+
+ROLES = ["TOP", "JUNGLE", "MIDDLE", "BOTTOM", "UTILITY"]
+
+N_PARTICIPANTS = 10
+# pořadí sloupců pro sum_team_from_frame
+PF_FIELDS = ("totalGold", "xp", "level", "minionsKilled", "jungleMinionsKilled")
+
+def team_sign(team: pd.Series):
+    # 100 -> +1, 200 -> -1, neznámý -> 0; sum přes zápas pak dá rovnou t100 - t200
+    return (team == 100).astype(int) - (team == 200).astype(int)
+
+def load_json(p: Path):
+    return json.loads(p.read_bytes())
+
+def get_pid2team(match_json: dict):
+    # participantId je vždy 1..10 -> pole místo dictu, index 0 = neznámý/žádný hráč (team 0)
+    m = np.zeros(N_PARTICIPANTS + 1, dtype=np.int16)
+    for p in match_json.get("info", {}).get("participants", []):
+        pid = p.get("participantId")
+        tid = p.get("teamId")
+        if pid is not None and tid is not None:
+            m[pid] = tid
+    return m
+
+def snap_frame_index(n_frames: int):
+    # frame index -> minuty, které z něj berou snapshot (frames po 60s, index = minuta;
+    # kratší hra -> poslední frame, jako get_frame v build_dataset)
+    at = {}
+    for minute in SNAP_MINUTES:
+        at.setdefault(min(minute, n_frames - 1), []).append(minute)
+    return at
+
+def team_masks(pid2team):
+    # bool masky přes participantId 1..10 (pozice i = pid i+1)
+    teams = pid2team[1:]
+    return {100: teams == 100, 200: teams == 200}
+
+def sum_team_from_frame(frame, masks):
+    # vrátí team totals: gold/xp/cs/lvl
+    pf = frame.get("participantFrames", {}) if frame else {}
+    objs = [pf.get(str(pid)) or {} for pid in range(1, N_PARTICIPANTS + 1)]
+    vals = np.array([[obj.get(f, 0) or 0 for f in PF_FIELDS] for obj in objs], dtype=np.int64)  # (10, 5)
+
+    totals = {}
+    for tid, mask in masks.items():
+        gold, xp, lvl, minions, jungle = vals[mask].sum(axis=0).tolist()
+        totals[tid] = dict(gold=gold, xp=xp, cs=minions + jungle, lvl=lvl)
+    return totals
+
+def extract_timeline(match_id: str, frames, pid2team):
+    # jeden průchod přes frames: eventy z každého framu + týmové součty ve snapshot minutách
+    # v smyčce indexujeme python list (numpy skalár by se boxoval na každém eventu)
+    m = pid2team.tolist()
+    masks = team_masks(pid2team)
+    snap_at = snap_frame_index(len(frames))
+    rows = []
+    snap_tot = {}
+    for i, fr in enumerate(frames):
+        for minute in snap_at.get(i, ()):
+            snap_tot[minute] = sum_team_from_frame(fr, masks)
+
+        for ev in fr.get("events", []):
+            ts = ev.get("timestamp")
+            if ts is None or ts > CUT15:
+                continue
+
+            et = ev.get("type")
+            code = EVENT_CODES.get(et)
+            if code is None:
+                continue
+
+            if et == "WARD_PLACED":
+                pid = ev.get("creatorId")
+            else:
+                pid = ev.get("killerId")
+            team = m[pid] if pid else 0
+            # fallback: budovy/monstra mají někdy jen killerTeamId
+            if team not in (100, 200) and et in ("BUILDING_KILL", "ELITE_MONSTER_KILL"):
+                kt = ev.get("killerTeamId")
+                if kt in (100, 200):
+                    team = kt
+
+            pid = ev.get("victimId")
+            victim_team = m[pid] if pid else 0
+
+            a100 = a200 = 0
+            for ap in ev.get("assistingParticipantIds") or []:
+                at = m[ap]
+                if at == 100:
+                    a100 += 1
+                elif at == 200:
+                    a200 += 1
+
+            rows.append((
+                match_id,
+                ts,
+                code,
+                team if team in (100, 200) else 0,
+                victim_team if victim_team in (100, 200) else 0,
+                a100,
+                a200,
+                WARD_CODES.get(ev.get("wardType"), 0),
+                MONSTER_CODES.get(ev.get("monsterType"), 0),
+                BUILDING_CODES.get(ev.get("buildingType"), 0),
+            ))
+
+    snap_rows = []
+    for minute in SNAP_MINUTES:
+        # bez timeline nuly, stejně jako prázdný frame
+        tot = snap_tot.get(minute) or sum_team_from_frame(None, masks)
+        for tid in (100, 200):
+            t = tot[tid]
+            snap_rows.append((match_id, minute, tid, t["gold"], t["xp"], t["cs"], t["lvl"]))
+    return rows, snap_rows
+
+def extract_roles(match_id: str, match_json: dict):
+    # (match_id, teamId, teamPosition, championId) pro hráče s platnou rolí, v pořadí participants
+    return [
+        (match_id, p.get("teamId"), p.get("teamPosition"), p.get("championId"))
+        for p in match_json.get("info", {}).get("participants", [])
+        if p.get("teamId") in (100, 200) and p.get("teamPosition") in ROLES and p.get("championId") is not None
+    ]
+
+def extract_match(match_id: str, m_path: Path, tl_path: Path):
+    # match + timeline se načtou jednou a vytáhne se z nich všechno, co augment skripty potřebují
+    match_json = load_json(m_path)
+    tl_json = load_json(tl_path)
+
+    pid2team = get_pid2team(match_json)
+    frames = tl_json.get("info", {}).get("frames", [])
+
+    events, snaps = extract_timeline(match_id, frames, pid2team)
+    return events, snaps, extract_roles(match_id, match_json)
+
+def build_cache():
+    ids, m_paths, tl_paths = [], [], []
+
+    for tl_path in sorted(TL_DIR.glob("*.json")):
+        match_id = tl_path.stem
+        m_path = MATCH_DIR / f"{match_id}.json"
+        if not m_path.exists():
+            continue
+        ids.append(match_id)
+        m_paths.append(m_path)
+        tl_paths.append(tl_path)
+
+    ev_rows, snap_rows, role_rows = [], [], []
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as ex:
+        for ev, snaps, roles in ex.map(extract_match, ids, m_paths, tl_paths, chunksize=32):
+            ev_rows.extend(ev)
+            snap_rows.extend(snaps)
+            role_rows.extend(roles)
+
+    events = pd.DataFrame(ev_rows, columns=EVENT_COLS).astype(EVENT_DTYPES)
+    snaps = pd.DataFrame(snap_rows, columns=SNAP_COLS)
+    roles = pd.DataFrame(role_rows, columns=ROLE_COLS)
+
+    write_table(events, EVENTS_PATH)
+    write_table(snaps, SNAPS_PATH)
+    write_table(roles, ROLES_PATH)
+    print(f"written: {EVENTS_PATH} rows={len(events)} matches={len(ids)}")
+    print(f"written: {SNAPS_PATH} rows={len(snaps)}")
+    print(f"written: {ROLES_PATH} rows={len(roles)}")
+    return events, snaps, roles
+
+def cache_is_fresh():
+    # mtime adresáře se mění při přidání/smazání souboru -> nové zápasy invalidují cache;
+    # změna tohohle souboru (schéma/kódy) taky
+    if not all(p.exists() for p in CACHE_PATHS):
+        return False
+    built = min(p.stat().st_mtime for p in CACHE_PATHS)
+    sources = [p for p in (MATCH_DIR, TL_DIR, Path(__file__)) if p.exists()]
+    return all(p.stat().st_mtime <= built for p in sources)
+
+def load_cache():
+    # (events, snapshots, roles); pokud cache chybí nebo je stará, postaví se znovu
+    if not cache_is_fresh():
+        return build_cache()
+    return tuple(pd.read_parquet(p) for p in CACHE_PATHS)
+
+def cached_match_ids(snaps: pd.DataFrame):
+    # snapshots mají řádek pro každý zápas, i když do 15:00 nemá žádný event
+    return sorted(snaps["match_id"].unique())
+
+def main():
+    build_cache()
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,31 @@
 # check_dataset.py
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-import json
+
+try:
+    import orjson as json
+except ImportError:
+    import json
 
 MATCH_DIR = Path("match")
 TL_DIR = Path("timeline")
 
 def ids_in(dirpath: Path):
-    out = set()
-    for p in dirpath.glob("*.json"):
-        out.add(p.stem)  # EUW1_123...
-    return out
+    # scandir vrací rovnou jména, bez Path objektu na každý soubor
+    with os.scandir(dirpath) as it:
+        return {e.name[:-5] for e in it if e.name.endswith(".json")}  # EUW1_123...
+
+def sanity(mid: str):
+    try:
+        with open(MATCH_DIR / f"{mid}.json", "rb") as f:
+            json.loads(f.read())
+        with open(TL_DIR / f"{mid}.json", "rb") as f:
+            json.loads(f.read())
+    except Exception as e:
+        return f"\nJSON parse problem for {mid}: {e}"
+    return None
 
 match_ids = ids_in(MATCH_DIR)
 tl_ids = ids_in(TL_DIR)
@@ -32,13 +48,10 @@ if only_tl[:10]:
     print("\nexamples missing match:")
     print("\n".join(only_tl[:10]))
 
-# quick JSON sanity sample
-sample = both[:5]
-for mid in sample:
-    m = MATCH_DIR / f"{mid}.json"
-    t = TL_DIR / f"{mid}.json"
-    try:
-        json.loads(m.read_text(encoding="utf-8"))
-        json.loads(t.read_text(encoding="utf-8"))
-    except Exception as e:
-        print(f"\nJSON parse problem for {mid}: {e}")
\ No newline at end of file
+# quick JSON sanity sample (--all = všechny spárované zápasy)
+sample = both if "--all" in sys.argv[1:] else both[:5]
+# čtení je hlavně čekání na disk -> vlákna překryjí latence
+with ThreadPoolExecutor(32) as ex:
+    for problem in ex.map(sanity, sample):
+        if problem:
+            print(problem)
\ No newline at end of file
@@ -1,6 +1,4 @@
-import pandas as pd
-
-df = pd.read_csv(r"out\teams.csv")
+from dataset_io import downcast, load_dataset
 
 features = [
     "delta_m10_gold_100_minus_200",
@@ -9,6 +7,8 @@ features = [
     "delta_m15_xp_100_minus_200",
 ]
 
+df = downcast(load_dataset("out/teams.parquet", columns=features))
+
 print("rows:", len(df))
 print("\nNaN per feature:")
 print(df[features].isna().sum())
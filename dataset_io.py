@@ -0,0 +1,177 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.dataset as ds
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+# Mezivýstupy pipeline (teams*, participants, objectives, ...) jsou Parquet:
+# typované sloupce + zstd, čtení bez parsování textu. CSV jen jako volitelné zrcadlo.
+
+
+def write_table(df: pd.DataFrame, path: Path, csv: bool = False):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    df.to_parquet(path, engine="pyarrow", compression="zstd", index=False)
+    if csv:
+        df.to_csv(path.with_suffix(".csv"), index=False, encoding="utf-8")
+
+
+# typy CSV sloupců podle prefixu/suffixu jména featury -> parser nic neodhaduje a drží rovnou malé typy
+FLOAT32_PREFIXES = ("delta_", "diff_", "d10_", "d15_")
+INT8_PREFIXES = ("first_",)
+INT8_SUFFIXES = ("_win",)
+
+
+def schema_dtypes(columns: list[str]) -> dict[str, str]:
+    dtypes = {}
+    for c in columns:
+        if c.startswith(FLOAT32_PREFIXES):
+            dtypes[c] = "float32"
+        elif c.startswith(INT8_PREFIXES) or c.endswith(INT8_SUFFIXES):
+            dtypes[c] = "int8"
+    return dtypes
+
+
+def read_csv_typed(path: Path) -> pa.Table:
+    # int8 sloupce se parsují jako float32: pandas zapisuje int sloupec s NaN jako 1.0/0.0, to int8
+    # parser odmítne; na int8 se převedou až po načtení, pokud nemají NaN a hodnoty jsou celé
+    dtypes = schema_dtypes(dataset_columns(path))
+    types = {c: pa.float32() if t == "int8" else pa.type_for_alias(t) for c, t in dtypes.items()}
+    tbl = pacsv.read_csv(path, convert_options=pacsv.ConvertOptions(column_types=types))
+    for c, t in dtypes.items():
+        if t != "int8" or tbl[c].null_count:
+            continue
+        try:
+            tbl = tbl.set_column(tbl.schema.get_field_index(c), c, tbl[c].cast(pa.int8()))
+        except pa.ArrowInvalid:
+            pass  # necelé hodnoty -> zůstává float32
+    return tbl
+
+
+def dataset_columns(path: Path) -> list[str]:
+    # jen hlavička/schéma, bez čtení dat
+    path = Path(path)
+    if path.suffix == ".parquet":
+        return pq.read_schema(path).names
+    with pacsv.open_csv(path) as reader:
+        return reader.schema.names
+
+
+def csv_cache(path: Path) -> Path:
+    # CSV se parsuje jen jednou -> <name>.csv.feather (Arrow IPC, lz4); přepíše se, když je CSV novější
+    cache = path.with_name(path.name + ".feather")
+    if not cache.exists() or cache.stat().st_mtime < path.stat().st_mtime:
+        feather.write_feather(read_csv_typed(path), cache, compression="lz4")
+    return cache
+
+
+def _source(path: Path):
+    # (soubor, formát) pro pyarrow; CSV se čte přes feather cache
+    path = Path(path)
+    if path.suffix == ".parquet":
+        return path, "parquet"
+    return csv_cache(path), "feather"
+
+
+def load_dataset(path: Path, columns: list[str] | None = None, filter=None) -> pd.DataFrame:
+    # čte jen potřebné sloupce (Parquet / feather projekce, CSV přes feather cache);
+    # filter = pyarrow.dataset výraz, řádky se odfiltrují už při čtení
+    path, fmt = _source(path)
+    if filter is not None:
+        tbl = ds.dataset(path, format=fmt).to_table(columns=columns, filter=filter)
+    elif fmt == "parquet":
+        tbl = pq.read_table(path, columns=columns)
+    else:
+        tbl = feather.read_table(path, columns=columns, memory_map=True)
+    return tbl.to_pandas(split_blocks=True, self_destruct=True)
+
+
+def load_first(path: Path, columns: list[str], filter, batch_size: int = 100_000) -> pd.DataFrame:
+    # první řádek, který projde filtrem; čte se po dávkách a skončí u první shody (bez full scanu)
+    path, fmt = _source(path)
+    for batch in ds.dataset(path, format=fmt).to_batches(columns=columns, filter=filter, batch_size=batch_size):
+        if batch.num_rows:
+            return batch.slice(0, 1).to_pandas()
+    return pd.DataFrame(columns=columns)
+
+
+def load_last(path: Path, columns: list[str]) -> pd.DataFrame:
+    # poslední řádek: čte se jen poslední row group (Parquet) / poslední record batch (feather)
+    path, fmt = _source(path)
+    if fmt == "parquet":
+        pf = pq.ParquetFile(path)
+        if not pf.num_row_groups:
+            return pd.DataFrame(columns=columns)
+        tbl = pf.read_row_group(pf.num_row_groups - 1, columns=columns)
+    else:
+        with pa.memory_map(str(path)) as source:
+            reader = pa.ipc.open_file(source)
+            if not reader.num_record_batches:
+                return pd.DataFrame(columns=columns)
+            tbl = pa.Table.from_batches([reader.get_batch(reader.num_record_batches - 1)]).select(columns)
+    return tbl.slice(tbl.num_rows - 1).to_pandas()
+
+
+def downcast(df: pd.DataFrame) -> pd.DataFrame:
+    # delty/počty se vejdou do int16/int32, float64 -> float32; méně RAM
+    for c in df.select_dtypes("integer").columns:
+        df[c] = pd.to_numeric(df[c], downcast="integer")
+    for c in df.select_dtypes("float").columns:
+        df[c] = pd.to_numeric(df[c], downcast="float")
+    return df
+
+
+# d10_*/d15_* = t100 - t200 team totals; v tabulkách nejsou, dopočítají se po načtení
+TEAM_DELTAS = {"d10_cs": ("cs", 10), "d15_cs": ("cs", 15), "d10_lvl": ("levelSum", 10), "d15_lvl": ("levelSum", 15)}
+_T100 = [f"t100_team_m{m}_{s}" for s, m in TEAM_DELTAS.values()]
+_T200 = [f"t200_team_m{m}_{s}" for s, m in TEAM_DELTAS.values()]
+TEAM_DELTA_SOURCES = _T100 + _T200
+
+
+def team_delta_columns(features: list[str]) -> list[str]:
+    # sloupce k načtení pro features: odvozené delty se nahradí jejich zdrojovými totals
+    return [c for c in features if c not in TEAM_DELTAS] + TEAM_DELTA_SOURCES
+
+
+def add_team_deltas(df: pd.DataFrame) -> pd.DataFrame:
+    # jedno odečtení (N, 4) bloků místo čtyř Series operací
+    df[list(TEAM_DELTAS)] = df[_T100].to_numpy() - df[_T200].to_numpy()
+    return df
+
+
+def as_float32_c(X):
+    # krok pipeline před logreg: husté -> C-contiguous float32, sparse zůstává sparse (jen float32).
+    # Žije tady, ne v train_full_cv, aby šel model unpicklovat i z predict_match.
+    if hasattr(X, "tocsr"):
+        return X.astype(np.float32)
+    return np.ascontiguousarray(X, dtype=np.float32)
+
+
+def match_key_col(df: pd.DataFrame, label: str) -> str:
+    # match id sloupec v teams* tabulkách (matchId z build_dataset, případně match_id)
+    for c in df.columns:
+        if c.lower() in {"match_id", "matchid"}:
+            return c
+    raise SystemExit(f"{label}: chybí sloupec match_id/matchId")
+
+
+# nad tolik sloupců už se víc vyplatí jeden index join než map po sloupcích
+MAP_MAX_COLS = 20
+
+
+def attach_by_key(base: pd.DataFrame, right: pd.DataFrame, key_col: str, right_key: str = "match_id") -> pd.DataFrame:
+    # left join 1:1 tabulky (jeden řádek na zápas) přes lookup v indexu místo merge hash-joinu
+    right = right.set_index(right_key)
+    if not right.index.is_unique:
+        raise ValueError(f"{right_key} is not unique in the right-hand table")
+
+    if len(right.columns) > MAP_MAX_COLS:
+        return base.join(right, on=key_col, how="left")
+
+    keys = base[key_col]
+    cols = {c: keys.map(right[c]) for c in right.columns}
+    return pd.concat([base, pd.DataFrame(cols, index=base.index)], axis=1)
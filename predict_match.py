@@ -4,6 +4,10 @@ from pathlib import Path
 import joblib
 import numpy as np
 import pandas as pd
+import pyarrow.dataset as ds
+import scipy.sparse as sp
+
+from dataset_io import dataset_columns, load_dataset, load_first, load_last
 
 
 def find_dataset_path(explicit: str | None = None) -> Path:
@@ -13,21 +17,18 @@ def find_dataset_path(explicit: str | None = None) -> Path:
             raise FileNotFoundError(f"Dataset not found: {p}")
         return p
 
-    candidates = [
-        Path("out") / "teams_full.csv",
-        Path("out") / "teams_plus_more.csv",
-        Path("out") / "teams_plus.csv",
-        Path("out") / "teams.csv",
-    ]
+    # Parquet z pipeline má přednost; CSV jen pokud existuje zrcadlo (--csv)
+    names = ["teams_full", "teams_plus_more", "teams_plus", "teams"]
+    candidates = [Path("out") / f"{n}{ext}" for n in names for ext in (".parquet", ".csv")]
     for p in candidates:
         if p.exists():
             return p
     raise FileNotFoundError(
-        "No dataset CSV found in out/. Expected one of: teams_full.csv, teams_plus_more.csv, teams_plus.csv, teams.csv"
+        "No dataset found in out/. Expected one of: teams_full, teams_plus_more, teams_plus, teams (.parquet or .csv)"
     )
 
 
-def detect_target_column(df: pd.DataFrame) -> str | None:
+def detect_target_column(columns: list[str]) -> str | None:
     candidates = [
         "team100_win",
         "win_100",
@@ -40,25 +41,27 @@ def detect_target_column(df: pd.DataFrame) -> str | None:
         "outcome",
     ]
     for c in candidates:
-        if c in df.columns:
+        if c in columns:
             return c
     return None
 
 
-def find_match_id_column(df: pd.DataFrame) -> str | None:
+def find_match_id_column(columns: list[str]) -> str | None:
     candidates = ["match_id", "matchId", "gameId", "id", "matchid", "game_id"]
     for c in candidates:
-        if c in df.columns:
+        if c in columns:
             return c
     return None
 
 
-def load_model(model_path: str | None = None):
+def load_model(model_path: str | None = None, mmap: bool = False):
     mp = Path(model_path) if model_path else (Path("out") / "model_full_cv.joblib")
     if not mp.exists():
         raise FileNotFoundError(f"Missing model file: {mp}. Run: python train_full_cv.py")
 
-    obj = joblib.load(mp)
+    # mmap: numpy pole modelu se jen namapují ze souboru (jen u modelu uloženého bez komprese,
+    # train_full_cv --no-compress); u komprimovaného joblib mmap ignoruje
+    obj = joblib.load(mp, mmap_mode="r" if mmap else None)
 
     # Pipeline saved directly
     if hasattr(obj, "predict_proba"):
@@ -69,6 +72,7 @@ def load_model(model_path: str | None = None):
         return {
             "pipeline": obj["pipeline"],
             "num_feats": obj.get("num_feats"),
+            "num_feats_f64": obj.get("num_feats_f64"),
             "cat_feats": obj.get("cat_feats"),
             "target": obj.get("target"),
         }
@@ -93,77 +97,86 @@ def explain_logreg(pipe, X_one: pd.DataFrame, topk: int = 20):
         print("\nEXPLAIN: cannot get feature names from preprocess")
         return
 
-    Xt = preprocess.transform(X_one)
-    if hasattr(Xt, "toarray"):
-        xvec = Xt.toarray()[0]
-    else:
-        xvec = np.asarray(Xt)[0]
+    # jen nenulové featury (one-hot je většinou nuly) -> O(nnz) místo hustého násobení přes všech p
+    row = sp.csr_matrix(preprocess.transform(X_one))[0]
+    idx = row.indices
 
     coefs = clf.coef_[0]
     intercept = float(clf.intercept_[0]) if hasattr(clf, "intercept_") else 0.0
 
-    contrib = xvec * coefs
+    contrib = row.data * coefs[idx]
     order = np.argsort(np.abs(contrib))[::-1]
 
     print("\nEXPLAIN (log-odds contributions; + pushes class 1, - pushes class 0)")
     print(f"intercept: {intercept:+.6f}")
 
     shown = 0
-    for idx in order:
+    for k in order:
         if shown >= topk:
             break
-        val = contrib[idx]
+        val = contrib[k]
         if not np.isfinite(val) or abs(val) < 1e-12:
             continue
-        print(f"{val:+.6f}  {names[idx]}")
+        print(f"{val:+.6f}  {names[idx[k]]}")
         shown += 1
 
 
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--match-id", default=None, help="Match/game id to score (optional)")
-    ap.add_argument("--dataset", default=None, help="Path to dataset CSV (default: auto from out/)")
+    ap.add_argument("--dataset", default=None, help="Path to dataset Parquet/CSV (default: auto from out/)")
     ap.add_argument("--model", default=None, help="Path to model joblib (default: out/model_full_cv.joblib)")
+    ap.add_argument("--mmap", action="store_true", help="Memory-map model arrays (model saved with train_full_cv --no-compress)")
     ap.add_argument("--explain", action="store_true", help="Print top feature contributions for the selected match")
     ap.add_argument("--topk", type=int, default=20, help="Top K contributions to print with --explain")
     args = ap.parse_args()
 
-    model = load_model(args.model)
+    model = load_model(args.model, mmap=args.mmap)
     pipe = model["pipeline"]
     num_feats = model["num_feats"]
     cat_feats = model["cat_feats"]
     saved_target = model["target"]
 
     dataset_path = find_dataset_path(args.dataset)
-    df = pd.read_csv(dataset_path, low_memory=False)
+    columns = dataset_columns(dataset_path)
 
-    target_col = saved_target if (saved_target in df.columns) else detect_target_column(df)
+    target_col = saved_target if (saved_target in columns) else detect_target_column(columns)
 
     # feature columns must match training
     if isinstance(num_feats, list) and isinstance(cat_feats, list) and (len(num_feats) + len(cat_feats) > 0):
         feat_cols = num_feats + cat_feats
-        missing = [c for c in feat_cols if c not in df.columns]
+        missing = [c for c in feat_cols if c not in columns]
         if missing:
             raise ValueError(f"Dataset is missing feature columns required by saved model: {missing}")
     else:
         # fallback: use all columns except target
-        feat_cols = [c for c in df.columns if c != target_col]
+        feat_cols = [c for c in columns if c != target_col]
 
-    id_col = find_match_id_column(df)
+    id_col = find_match_id_column(columns)
+
+    # načíst jen sloupce pro predikci (+ id, target)
+    load_cols = list(dict.fromkeys(feat_cols + [c for c in (id_col, target_col) if c is not None]))
 
     # select row
     if args.match_id is not None and id_col is not None:
         want = str(args.match_id)
-        series = df[id_col].astype(str)
-        hits = df[series == want]
+        # filtr na id se vyhodnotí už při čtení, čtení skončí u první shody
+        hits = load_first(dataset_path, load_cols, filter=ds.field(id_col).cast("string") == want)
         if hits.empty:
-            sample = df[id_col].astype(str).head(20).tolist()
+            sample = load_dataset(dataset_path, [id_col]).head(20)[id_col].astype(str).tolist()
             raise ValueError(f"Match id '{want}' not found in column '{id_col}'. Sample ids: {sample}")
-        row = hits.iloc[0:1].copy()
+        row = hits
     else:
-        row = df.iloc[-1:].copy()
+        row = load_last(dataset_path, load_cols)
 
-    X = row[feat_cols]
+    # row je už jen jeden řádek (load_first/load_last); X rovnou z dictu 1-prvkových polí,
+    # numerické featury ve stejném dtype jako při tréninku (train_full_cv)
+    num_set = set(num_feats) if isinstance(num_feats, list) else set()
+    num_set -= set(model.get("num_feats_f64") or [])
+    X = pd.DataFrame({
+        c: row[c].to_numpy(dtype=np.float32) if c in num_set else row[c].to_numpy()
+        for c in feat_cols
+    })
 
     # predict
     proba = None
@@ -174,8 +187,10 @@ def main():
             proba = float(probs[classes.index(1)])
         else:
             proba = float(probs[0])
-
-    pred = int(pipe.predict(X)[0])
+        # predict() je argmax přes predict_proba -> druhý průchod pipeline není potřeba
+        pred = int(classes[int(np.argmax(probs))])
+    else:
+        pred = int(pipe.predict(X)[0])
 
     # output
     if id_col is not None and id_col in row.columns:
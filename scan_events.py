@@ -0,0 +1,161 @@
+import numpy as np
+import pandas as pd
+
+try:
+    from numba import njit
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+    # numba je v requirements; bez ní běží stejné smyčky v čistém Pythonu (řádově pomalejší, výsledky sedí)
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda f: f
+
+from cache_timelines import BUILDING_CODES, EVENT_CODES, MONSTER_CODES, WARD_CODES
+
+CUT10 = 10 * 60 * 1000
+CUT14 = 14 * 60 * 1000
+
+# kódy jako moduloví konstanty -> numba je zapeče do strojového kódu
+CHAMPION_KILL          = EVENT_CODES["CHAMPION_KILL"]
+TURRET_PLATE_DESTROYED = EVENT_CODES["TURRET_PLATE_DESTROYED"]
+BUILDING_KILL          = EVENT_CODES["BUILDING_KILL"]
+ELITE_MONSTER_KILL     = EVENT_CODES["ELITE_MONSTER_KILL"]
+TOWER_BUILDING = BUILDING_CODES["TOWER_BUILDING"]
+DRAGON         = MONSTER_CODES["DRAGON"]
+RIFTHERALD     = MONSTER_CODES["RIFTHERALD"]
+CONTROL_WARD   = WARD_CODES["CONTROL_WARD"]
+
+# sloupce výstupu scan_objectives (t100 - t200; first_*: 1 team100, -1 team200, 0 nikdo)
+OBJ_COLS = [
+    "diff_k10", "diff_d10", "diff_a10",
+    "diff_k15", "diff_d15", "diff_a15",
+    "diff_plates14", "diff_towers15", "diff_drakes15", "diff_herald15",
+    "first_blood", "first_drake", "first_tower", "first_herald",
+]
+K10, D10, A10, K15, D15, A15, PLATES14, TOWERS15, DRAKES15, HERALD15 = range(10)
+FIRST_BLOOD, FIRST_DRAKE, FIRST_TOWER, FIRST_HERALD = range(10, 14)
+
+
+@njit(cache=True)
+def _sign(team):
+    if team == 100:
+        return 1
+    if team == 200:
+        return -1
+    return 0
+
+
+@njit(cache=True)
+def scan_objectives(match_idx, ts, etype, team, victim_team, a100, a200, monster, building, out):
+    # jeden průchod přes celou events tabulku (v pořadí timeline); out[match_idx[i]] += ...
+    for i in range(ts.shape[0]):
+        m = match_idx[i]
+        t = ts[i]
+        e = etype[i]
+        s = _sign(team[i])
+
+        if e == CHAMPION_KILL:
+            v = _sign(victim_team[i])
+            a = a100[i] - a200[i]
+            if out[m, FIRST_BLOOD] == 0:
+                out[m, FIRST_BLOOD] = s
+            if t <= CUT10:
+                out[m, K10] += s
+                out[m, D10] += v
+                out[m, A10] += a
+            out[m, K15] += s
+            out[m, D15] += v
+            out[m, A15] += a
+
+        elif e == TURRET_PLATE_DESTROYED:
+            if t <= CUT14:
+                out[m, PLATES14] += s
+
+        elif e == BUILDING_KILL:
+            if building[i] == TOWER_BUILDING:
+                if out[m, FIRST_TOWER] == 0:
+                    out[m, FIRST_TOWER] = s
+                out[m, TOWERS15] += s
+
+        elif e == ELITE_MONSTER_KILL:
+            if monster[i] == DRAGON:
+                if out[m, FIRST_DRAKE] == 0:
+                    out[m, FIRST_DRAKE] = s
+                out[m, DRAKES15] += s
+            elif monster[i] == RIFTHERALD:
+                if out[m, FIRST_HERALD] == 0:
+                    out[m, FIRST_HERALD] = s
+                out[m, HERALD15] += s
+
+
+# ward čítače: 6 polí po 10 bitech v jednom uint64 na (zápas, tým); do 15:00 se 1023 nepřeleze
+WARD_COLS = [
+    "diff_wardsPlaced10", "diff_wardsKilled10", "diff_ctrlWardsPlaced10",
+    "diff_wardsPlaced15", "diff_wardsKilled15", "diff_ctrlWardsPlaced15",
+]
+WARD_LANE_BITS = 10
+WARD_LANE_MASK = (1 << WARD_LANE_BITS) - 1
+
+
+def _build_ward_inc():
+    # INC[team_idx, type, do 10:00, control ward] -> co přičíst do packed stavu (team_idx 0 = neznámý -> 0)
+    lane = [np.uint64(1) << np.uint64(WARD_LANE_BITS * i) for i in range(len(WARD_COLS))]
+    wp10, wk10, cwp10, wp15, wk15, cwp15 = lane
+    inc = np.zeros((3, max(EVENT_CODES.values()) + 1, 2, 2), dtype=np.uint64)
+    for ti in (1, 2):
+        for b10 in (0, 1):
+            for ctrl in (0, 1):
+                placed = wp15 + (wp10 if b10 else 0)
+                if ctrl:
+                    placed += cwp15 + (cwp10 if b10 else 0)
+                inc[ti, EVENT_CODES["WARD_PLACED"], b10, ctrl] = placed
+                inc[ti, EVENT_CODES["WARD_KILL"], b10, ctrl] = wk15 + (wk10 if b10 else 0)
+    return inc
+
+
+WARD_INC = _build_ward_inc()
+
+
+@njit(cache=True)
+def scan_wards(match_idx, ts, etype, team, ward, inc, state):
+    # bez větvení: jeden lookup + jedno sčítání na event; state[match, team_idx] je packed uint64
+    for i in range(ts.shape[0]):
+        t = team[i]
+        ti = (t == 100) * 1 + (t == 200) * 2
+        b10 = (ts[i] <= CUT10) * 1
+        ctrl = (ward[i] == CONTROL_WARD) * 1
+        state[match_idx[i], ti] += inc[ti, etype[i], b10, ctrl]
+
+
+def scan_wards_np(match_idx, ts, etype, team, ward, inc, state):
+    # stejné lookupy vektorově; np.add.at sčítá i opakované (zápas, tým) indexy
+    ti = (team == 100) * 1 + (team == 200) * 2
+    b10 = (ts <= CUT10) * 1
+    ctrl = (ward == CONTROL_WARD) * 1
+    np.add.at(state, (match_idx, ti), inc[ti, etype, b10, ctrl])
+
+
+if not HAVE_NUMBA:
+    # smyčka scan_wards by bez JITu běžela po prvcích v Pythonu (pomalejší než groupby)
+    scan_wards = scan_wards_np
+
+
+def unpack_wards(state):
+    # (n, 3) packed -> (n, len(WARD_COLS)) diffů t100 - t200
+    shifts = np.arange(len(WARD_COLS), dtype=np.uint64) * np.uint64(WARD_LANE_BITS)
+    lanes = (state[:, :, None] >> shifts) & np.uint64(WARD_LANE_MASK)
+    return lanes[:, 1].astype(np.int64) - lanes[:, 2].astype(np.int64)
+
+
+def match_index(events: pd.DataFrame, match_ids):
+    # pozice zápasu v match_ids pro každý event (řádek v out)
+    idx = pd.Index(match_ids).get_indexer(events["match_id"])
+    if (idx < 0).any():
+        raise ValueError("events contain a match_id that is not in match_ids")
+    return idx.astype(np.int32)
+
+
+def col(events: pd.DataFrame, name: str, dtype):
+    return np.ascontiguousarray(events[name].to_numpy(), dtype=dtype)
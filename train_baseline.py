@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 from sklearn.model_selection import train_test_split
 from sklearn.pipeline import Pipeline
@@ -5,35 +6,29 @@ from sklearn.preprocessing import StandardScaler
 from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import accuracy_score, roc_auc_score, confusion_matrix, classification_report
 
-df = pd.read_csv(r"out\teams.csv")
+from dataset_io import add_team_deltas, load_dataset, team_delta_columns
 
-# odvozené delty z team totals (už jsou v souboru)
-def delta(col_suffix: str, minute: int):
-    a = f"t100_team_m{minute}_{col_suffix}"
-    b = f"t200_team_m{minute}_{col_suffix}"
-    return df[a] - df[b]
+feats = [
+    "delta_m10_gold_100_minus_200",
+    "delta_m10_xp_100_minus_200",
+    "delta_m15_gold_100_minus_200",
+    "delta_m15_xp_100_minus_200",
+    "d10_cs",
+    "d15_cs",
+    "d10_lvl",
+    "d15_lvl",
+]
 
-df["d10_cs"] = delta("cs", 10)
-df["d15_cs"] = delta("cs", 15)
-df["d10_lvl"] = delta("levelSum", 10)
-df["d15_lvl"] = delta("levelSum", 15)
+df = load_dataset("out/teams.parquet", team_delta_columns(feats) + ["team100_win"])
 
-X = df[
-    [
-        "delta_m10_gold_100_minus_200",
-        "delta_m10_xp_100_minus_200",
-        "delta_m15_gold_100_minus_200",
-        "delta_m15_xp_100_minus_200",
-        "d10_cs",
-        "d15_cs",
-        "d10_lvl",
-        "d15_lvl",
-    ]
-].copy()
+add_team_deltas(df)
+
+# jedna float32 matice, NaN maska přímo nad ní; sklearn dostane rovnou ndarray
+X = np.ascontiguousarray(df[feats].to_numpy(dtype=np.float32))
 
-y = df["team100_win"].astype(int)
+y = df["team100_win"].to_numpy(dtype=int)
 
-mask = ~X.isna().any(axis=1)
+mask = ~np.isnan(X).any(axis=1)
 X = X[mask]
 y = y[mask]
 
@@ -65,7 +60,7 @@ print("\nReport:\n", classification_report(y_test, pred, digits=4))
 
 # koeficienty (po standardizaci)
 clf = model.named_steps["clf"]
-cols = X.columns.tolist()
+cols = feats
 coef = pd.Series(clf.coef_[0], index=cols).sort_values(key=lambda s: s.abs(), ascending=False)
 print("\nTop coefficients (abs):")
 print(coef)
\ No newline at end of file
@@ -1,24 +1,12 @@
 import numpy as np
-import pandas as pd
 
-from sklearn.model_selection import StratifiedKFold, cross_val_score
+from sklearn.model_selection import StratifiedKFold, cross_validate
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import StandardScaler
 from sklearn.linear_model import LogisticRegression
 from sklearn.ensemble import HistGradientBoostingClassifier
 
-df = pd.read_csv(r"out\teams_plus_more.csv")
-
-# odvozené delty z team totals (pokud jsou v CSV)
-def delta(col_suffix: str, minute: int):
-    a = f"t100_team_m{minute}_{col_suffix}"
-    b = f"t200_team_m{minute}_{col_suffix}"
-    return df[a] - df[b]
-
-df["d10_cs"]  = delta("cs", 10)
-df["d15_cs"]  = delta("cs", 15)
-df["d10_lvl"] = delta("levelSum", 10)
-df["d15_lvl"] = delta("levelSum", 15)
+from dataset_io import add_team_deltas, load_dataset, team_delta_columns
 
 base_feats = [
     "delta_m10_gold_100_minus_200",
@@ -52,10 +40,14 @@ more_feats = [
     "diff_ctrlWardsPlaced15",
 ]
 
-X = df[base_feats + obj_feats + more_feats].copy()
-y = df["team100_win"].astype(int)
+df = load_dataset("out/teams_plus_more.parquet", team_delta_columns(base_feats + obj_feats + more_feats) + ["team100_win"])
+
+add_team_deltas(df)
+
+X = np.ascontiguousarray(df[base_feats + obj_feats + more_feats].to_numpy(dtype=np.float32))
+y = df["team100_win"].to_numpy(dtype=int)
 
-mask = ~X.isna().any(axis=1)
+mask = ~np.isnan(X).any(axis=1)
 X = X[mask]
 y = y[mask]
 print("usable rows:", len(X), "features:", X.shape[1])
@@ -71,12 +63,17 @@ hgb = HistGradientBoostingClassifier(
     max_depth=3,
     learning_rate=0.08,
     max_iter=400,
+    # zastaví se, když se validační loss 20 kol nezlepší (místo vždy 400 stromů)
+    early_stopping=True,
+    validation_fraction=0.1,
+    n_iter_no_change=20,
     random_state=42
 )
 
 def eval_model(name, model):
-    auc = cross_val_score(model, X, y, cv=cv, scoring="roc_auc")
-    acc = cross_val_score(model, X, y, cv=cv, scoring="accuracy")
+    res = cross_validate(model, X, y, cv=cv, scoring=["roc_auc", "accuracy"], n_jobs=-1)
+    auc = res["test_roc_auc"]
+    acc = res["test_accuracy"]
     print(f"\n{name}")
     print(f"ROC AUC: {auc.mean():.4f} ± {auc.std():.4f}")
     print(f"ACC:     {acc.mean():.4f} ± {acc.std():.4f}")
@@ -1,4 +1,5 @@
 import argparse
+import pickle
 from pathlib import Path
 from datetime import datetime
 
@@ -6,12 +7,36 @@ import joblib
 import numpy as np
 import pandas as pd
 
+try:
+    from numba import njit, prange
+    HAVE_NUMBA = True
+except ImportError:
+    # bez numby se audit počítá přes audit_frame (pandas), kernel se jen nadefinuje
+    HAVE_NUMBA = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda f: f
+
 from sklearn.compose import ColumnTransformer
 from sklearn.impute import SimpleImputer
 from sklearn.linear_model import LogisticRegression
-from sklearn.model_selection import StratifiedKFold, cross_val_score
+from sklearn.model_selection import StratifiedKFold, cross_validate
 from sklearn.pipeline import Pipeline
-from sklearn.preprocessing import OneHotEncoder, StandardScaler
+from sklearn.preprocessing import FunctionTransformer, OneHotEncoder, StandardScaler
+
+from dataset_io import as_float32_c, load_dataset
+
+try:
+    import lz4  # noqa: F401  (joblib ho použije pro compress=("lz4", ...))
+    MODEL_COMPRESS = ("lz4", 3)
+except ImportError:
+    MODEL_COMPRESS = ("zlib", 3)
+
+# největší celé číslo, které float32 drží přesně
+F32_EXACT_INT = 2 ** 24
 
 
 def find_dataset_path(explicit: str | None = None) -> Path:
@@ -21,17 +46,14 @@ def find_dataset_path(explicit: str | None = None) -> Path:
             raise FileNotFoundError(f"Dataset not found: {p}")
         return p
 
-    candidates = [
-        Path("out") / "teams_full.csv",
-        Path("out") / "teams_plus_more.csv",
-        Path("out") / "teams_plus.csv",
-        Path("out") / "teams.csv",
-    ]
+    # Parquet z pipeline má přednost; CSV jen pokud existuje zrcadlo (--csv)
+    names = ["teams_full", "teams_plus_more", "teams_plus", "teams"]
+    candidates = [Path("out") / f"{n}{ext}" for n in names for ext in (".parquet", ".csv")]
     for p in candidates:
         if p.exists():
             return p
     raise FileNotFoundError(
-        "No dataset CSV found in out/. Expected one of: teams_full.csv, teams_plus_more.csv, teams_plus.csv, teams.csv"
+        "No dataset found in out/. Expected one of: teams_full, teams_plus_more, teams_plus, teams (.parquet or .csv)"
     )
 
 
@@ -93,6 +115,68 @@ def _perfect_threshold_separation(col: pd.Series, y: pd.Series) -> bool:
     return False
 
 
+AUDIT_BINARY, AUDIT_IDENTICAL, AUDIT_INVERSE, AUDIT_SPLIT = range(4)
+
+
+@njit(parallel=True, cache=True)
+def audit_numeric(X, y):
+    # jeden průchod přes každý sloupec (N, p) matice: binárnost, shoda/inverze s targetem,
+    # min/max po třídách pro perfektní threshold split; NaN se přeskakují
+    n, p = X.shape
+    flags = np.zeros((p, 4), dtype=np.bool_)
+    for j in prange(p):
+        cnt = 0
+        binary = True
+        same = True
+        inverse = True
+        min0 = np.inf
+        max0 = -np.inf
+        min1 = np.inf
+        max1 = -np.inf
+        for i in range(n):
+            v = X[i, j]
+            if np.isnan(v):
+                continue
+            cnt += 1
+            if v != 0.0 and v != 1.0:
+                binary = False
+            if y[i] == 1:
+                same = same and v == 1.0
+                inverse = inverse and v == 0.0
+                min1 = min(min1, v)
+                max1 = max(max1, v)
+            else:
+                same = same and v == 0.0
+                inverse = inverse and v == 1.0
+                min0 = min(min0, v)
+                max0 = max(max0, v)
+        is_binary = binary and cnt > 0
+        flags[j, AUDIT_BINARY] = is_binary
+        flags[j, AUDIT_IDENTICAL] = is_binary and same
+        flags[j, AUDIT_INVERSE] = is_binary and inverse
+        if min0 <= max0 and min1 <= max1:
+            flags[j, AUDIT_SPLIT] = max0 < min1 or max1 < min0
+    return flags
+
+
+def audit_frame(df_num: pd.DataFrame, y: pd.Series) -> np.ndarray:
+    # stejné flagy jako audit_numeric, ale sloupcovými pandas operacemi (jeden groupby min/max
+    # pro všechny sloupce místo 4 redukcí na sloupec); použije se, když není numba
+    nonnull = df_num.notna()
+    binary = (df_num.isin([0, 1]) | ~nonnull).all() & nonnull.any()
+    identical = binary & (df_num.eq(y, axis=0) | ~nonnull).all()
+    inverse = binary & (df_num.eq(1 - y, axis=0) | ~nonnull).all()
+
+    stats = df_num.groupby(y).agg(["min", "max"])
+    split = pd.Series(False, index=df_num.columns)
+    if 0 in stats.index and 1 in stats.index:
+        mn = stats.xs("min", axis=1, level=1)
+        mx = stats.xs("max", axis=1, level=1)
+        split = (mx.loc[0] < mn.loc[1]) | (mx.loc[1] < mn.loc[0])
+
+    return np.column_stack([binary, identical, inverse, split]).astype(bool)
+
+
 def leak_name_based_drop(columns: list[str], target: str) -> tuple[list[str], dict[str, list[str]]]:
     reasons: dict[str, list[str]] = {
         "id_like": [],
@@ -144,7 +228,14 @@ def build_pipeline(num_feats: list[str], cat_feats: list[str]) -> Pipeline:
         cat_pipe = Pipeline(
             steps=[
                 ("imputer", SimpleImputer(strategy="most_frequent")),
-                ("onehot", OneHotEncoder(handle_unknown="ignore")),
+                # vzácné kategorie (šampioni viděni pár krát) -> jeden "infrequent" sloupec
+                ("onehot", OneHotEncoder(
+                    handle_unknown="infrequent_if_exist",
+                    min_frequency=10,
+                    max_categories=64,
+                    sparse_output=True,
+                    dtype=np.float32,
+                )),
             ]
         )
         transformers.append(("cat", cat_pipe, cat_feats))
@@ -154,27 +245,33 @@ def build_pipeline(num_feats: list[str], cat_feats: list[str]) -> Pipeline:
 
     preprocess = ColumnTransformer(transformers=transformers, remainder="drop")
 
+    # L2 na desítkách featur: lbfgs konverguje za pár desítek iterací (saga potřebuje tisíce průchodů)
     clf = LogisticRegression(
-        max_iter=8000,
-        solver="saga",
+        max_iter=1000,
+        solver="lbfgs",
         C=1.0,
     )
 
-    return Pipeline(steps=[("preprocess", preprocess), ("clf", clf)])
+    return Pipeline(steps=[
+        ("preprocess", preprocess),
+        ("float32", FunctionTransformer(as_float32_c, accept_sparse=True)),
+        ("clf", clf),
+    ])
 
 
 def main():
     ap = argparse.ArgumentParser()
-    ap.add_argument("--dataset", default=None, help="Path to dataset CSV (default: auto from out/)")
+    ap.add_argument("--dataset", default=None, help="Path to dataset Parquet/CSV (default: auto from out/)")
     ap.add_argument("--target", default=None, help="Target column (default: auto-detect)")
     ap.add_argument("--model-out", default=str(Path("out") / "model_full_cv.joblib"))
     ap.add_argument("--no-save", action="store_true")
+    ap.add_argument("--no-compress", action="store_true", help="Save the model uncompressed (for predict_match --mmap)")
     ap.add_argument("--audit-only", action="store_true", help="Only print leak audit results; do not train.")
     ap.add_argument("--cv", type=int, default=5)
     args = ap.parse_args()
 
     dataset_path = find_dataset_path(args.dataset)
-    df = pd.read_csv(dataset_path, low_memory=False)
+    df = load_dataset(dataset_path)
 
     target = args.target or detect_target_column(df)
     if not target:
@@ -195,7 +292,27 @@ def main():
     drop2_reasons: dict[str, str] = {}
 
     feature_candidates = [c for c in df2.columns if c != target]
+
+    # numerické sloupce najednou přes audit_numeric (float64, ať velká čísla jako gameCreation neztratí přesnost)
+    num_cands = [c for c in feature_candidates if pd.api.types.is_numeric_dtype(df2[c])]
+    if num_cands:
+        if HAVE_NUMBA:
+            X_num = np.ascontiguousarray(df2[num_cands].to_numpy(dtype=np.float64, na_value=np.nan))
+            flags = audit_numeric(X_num, y.to_numpy(dtype=np.int64))
+        else:
+            flags = audit_frame(df2[num_cands], y)
+        for c, f in zip(num_cands, flags):
+            if f[AUDIT_IDENTICAL] or f[AUDIT_INVERSE]:
+                drop2.append(c)
+                drop2_reasons[c] = "identical_to_target" if f[AUDIT_IDENTICAL] else "inverse_of_target"
+            elif f[AUDIT_SPLIT]:
+                drop2.append(c)
+                drop2_reasons[c] = "perfect_threshold_separation"
+
+    # zbytek (text/kategorie) zůstává v Pythonu, těch sloupců je pár
     for c in feature_candidates:
+        if c in num_cands:
+            continue
         s = df2[c]
 
         if _is_binary_01(s):
@@ -205,7 +322,7 @@ def main():
                 drop2_reasons[c] = why or "same_or_inverse"
                 continue
 
-        if pd.api.types.is_numeric_dtype(s) or _is_binary_01(s):
+        if _is_binary_01(s):
             if _perfect_threshold_separation(s, y):
                 drop2.append(c)
                 drop2_reasons[c] = "perfect_threshold_separation"
@@ -250,26 +367,34 @@ def main():
 
     print(f"features: num={len(num_feats)} cat={len(cat_feats)} total={len(feature_cols)}")
 
-    X = df3[feature_cols]
+    # numerické featury jako float32 -> imputer/scaler/onehot drží float32 a logreg fituje nad
+    # contiguous float32 maticí; mean/scale zůstávají ve scaleru v pipeline pro predict_match.
+    # float32 drží celá čísla přesně jen do 2**24 -> větší (gameCreation v epoch ms) zůstávají
+    # float64 a na float32 se převedou až po škálování (as_float32_c)
+    col_max = df3[num_feats].astype(np.float64).abs().max()
+    num_feats_f64 = [c for c in num_feats if col_max[c] > F32_EXACT_INT]
+    X = df3[feature_cols].astype({c: np.float32 for c in num_feats if c not in num_feats_f64})
 
     pipe = build_pipeline(num_feats=num_feats, cat_feats=cat_feats)
 
     cv = StratifiedKFold(n_splits=max(2, args.cv), shuffle=True, random_state=42)
 
-    aucs = cross_val_score(pipe, X, y, cv=cv, scoring="roc_auc", error_score="raise")
-    accs = cross_val_score(pipe, X, y, cv=cv, scoring="accuracy", error_score="raise")
+    res = cross_validate(pipe, X, y, cv=cv, scoring=["roc_auc", "accuracy"], n_jobs=-1, error_score="raise")
+    aucs = res["test_roc_auc"]
+    accs = res["test_accuracy"]
 
     print(f"ROC AUC: {aucs.mean():.4f} ± {aucs.std():.4f}")
     print(f"ACC:     {accs.mean():.4f} ± {accs.std():.4f}")
 
-    pipe.fit(X, y)
-
+    # finální fit na všech datech jen pro uložení modelu; s --no-save stačí CV metriky
     if not args.no_save:
+        pipe.fit(X, y)
         out_path = Path(args.model_out)
         out_path.parent.mkdir(parents=True, exist_ok=True)
         payload = {
             "pipeline": pipe,
             "num_feats": num_feats,
+            "num_feats_f64": num_feats_f64,
             "cat_feats": cat_feats,
             "target": target,
             "dataset": str(dataset_path),
@@ -277,7 +402,8 @@ def main():
             "dropped_value_based": drop2,
             "created_at": datetime.utcnow().isoformat() + "Z",
         }
-        joblib.dump(payload, out_path)
+        compress = 0 if args.no_compress else MODEL_COMPRESS
+        joblib.dump(payload, out_path, compress=compress, protocol=pickle.HIGHEST_PROTOCOL)
         print(f"Saved model to: {out_path.resolve()}")
 
 
@@ -1,22 +1,11 @@
-import pandas as pd
+import numpy as np
 from sklearn.model_selection import train_test_split
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import StandardScaler
 from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import accuracy_score, roc_auc_score
 
-df = pd.read_csv(r"out\teams_plus.csv")
-
-# odvozené delty z totals
-def delta(col_suffix: str, minute: int):
-    a = f"t100_team_m{minute}_{col_suffix}"
-    b = f"t200_team_m{minute}_{col_suffix}"
-    return df[a] - df[b]
-
-df["d10_cs"]  = delta("cs", 10)
-df["d15_cs"]  = delta("cs", 15)
-df["d10_lvl"] = delta("levelSum", 10)
-df["d15_lvl"] = delta("levelSum", 15)
+from dataset_io import add_team_deltas, load_dataset, team_delta_columns
 
 base_feats = [
     "delta_m10_gold_100_minus_200",
@@ -36,10 +25,14 @@ obj_feats = [
     "first_blood","first_drake","first_tower","first_herald",
 ]
 
-X = df[base_feats + obj_feats].copy()
-y = df["team100_win"].astype(int)
+df = load_dataset("out/teams_plus.parquet", team_delta_columns(base_feats + obj_feats) + ["team100_win"])
+
+add_team_deltas(df)
+
+X = np.ascontiguousarray(df[base_feats + obj_feats].to_numpy(dtype=np.float32))
+y = df["team100_win"].to_numpy(dtype=int)
 
-mask = ~X.isna().any(axis=1)
+mask = ~np.isnan(X).any(axis=1)
 X = X[mask]
 y = y[mask]
 print("usable rows:", len(X))
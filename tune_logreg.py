@@ -1,20 +1,16 @@
+import warnings
+
 import numpy as np
-import pandas as pd
 
-from sklearn.model_selection import StratifiedKFold, GridSearchCV
-from sklearn.pipeline import Pipeline
+from joblib import Parallel, delayed
+from scipy.special import expit
+from sklearn.model_selection import StratifiedKFold
 from sklearn.preprocessing import StandardScaler
 from sklearn.linear_model import LogisticRegression
+from sklearn.exceptions import ConvergenceWarning
+from sklearn.metrics import roc_auc_score
 
-df = pd.read_csv(r"out\teams_plus_more.csv")
-
-def delta(col_suffix: str, minute: int):
-    return df[f"t100_team_m{minute}_{col_suffix}"] - df[f"t200_team_m{minute}_{col_suffix}"]
-
-df["d10_cs"]  = delta("cs", 10)
-df["d15_cs"]  = delta("cs", 15)
-df["d10_lvl"] = delta("levelSum", 10)
-df["d15_lvl"] = delta("levelSum", 15)
+from dataset_io import add_team_deltas, load_dataset, team_delta_columns
 
 feats = [
     "delta_m10_gold_100_minus_200","delta_m10_xp_100_minus_200",
@@ -29,26 +25,104 @@ feats = [
     "diff_wardsPlaced15","diff_wardsKilled15","diff_ctrlWardsPlaced15",
 ]
 
-X = df[feats].copy()
-y = df["team100_win"].astype(int)
-mask = ~X.isna().any(axis=1)
+df = load_dataset("out/teams_plus_more.parquet", team_delta_columns(feats) + ["team100_win"])
+
+add_team_deltas(df)
+
+X = np.ascontiguousarray(df[feats].to_numpy(dtype=np.float32))
+y = df["team100_win"].to_numpy(dtype=int)
+mask = ~np.isnan(X).any(axis=1)
 X = X[mask]
 y = y[mask]
 
-pipe = Pipeline([
-    ("scaler", StandardScaler()),
-    ("clf", LogisticRegression(max_iter=8000, solver="saga"))
-])
-
-param_grid = {
-    "clf__penalty": ["l2", "l1", "elasticnet"],
-    "clf__C": [0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0],
-    "clf__l1_ratio": [0.2, 0.5, 0.8],  # jen pro elasticnet, ostatní ignoruje
-}
+PENALTIES = ["l2", "l1", "elasticnet"]
+CS = [0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0]  # vzestupně -> warm start jde po regularizační cestě
+L1_RATIOS = [0.2, 0.5, 0.8]  # jen pro elasticnet
+# nejvhodnější solver pro každou penalizaci; l2 řeší newton_l2 níž, saga jen tam, kde jiný elasticnet neumí
+SOLVERS = {"l1": ("liblinear", 1000), "elasticnet": ("saga", 8000)}
 
 cv = StratifiedKFold(n_splits=5, shuffle=True, random_state=42)
-gs = GridSearchCV(pipe, param_grid=param_grid, scoring="roc_auc", cv=cv, n_jobs=-1, refit=True)
-gs.fit(X, y)
 
-print("best AUC:", gs.best_score_)
-print("best params:", gs.best_params_)
\ No newline at end of file
+# scaler závisí jen na foldu, ne na hyperparametrech -> každý fold se standardizuje jednou
+folds = []
+for tr, te in cv.split(X, y):
+    scaler = StandardScaler().fit(X[tr])
+    folds.append((scaler.transform(X[tr]), y[tr], scaler.transform(X[te]), y[te]))
+
+def with_intercept(X):
+    # float64 + sloupec jedniček pro intercept; jednou na fold, sdílí se přes celou C cestu
+    return np.hstack([X.astype(np.float64), np.ones((len(X), 1))])
+
+def newton_l2(Xa, y, C, w=None, tol=1e-8, max_iter=50):
+    # stejný cíl jako LogisticRegression(penalty="l2"): C * sum(logloss) + 0.5 * ||coef||^2 (intercept bez penalizace)
+    # p ~ 40 featur -> Hessián (p+1)x(p+1) je levný, pár Newtonových kroků místo stovek lbfgs iterací
+    n_feat = Xa.shape[1]
+    reg = np.ones(n_feat)
+    reg[-1] = 0.0
+    w = np.zeros(n_feat) if w is None else w.copy()
+
+    def loss(w, z):
+        return C * np.sum(np.logaddexp(0.0, z) - y * z) + 0.5 * np.sum(reg * w * w)
+
+    z = Xa @ w
+    f = loss(w, z)
+    for _ in range(max_iter):
+        p = expit(z)
+        grad = C * (Xa.T @ (p - y)) + reg * w
+        H = C * (Xa.T @ (Xa * (p * (1.0 - p))[:, None])) + np.diag(reg)
+        step = np.linalg.solve(H, grad)
+        # půlení kroku, dokud loss dost neklesne (Armijo); u separovatelných dat plný krok přestřelí
+        t = 1.0
+        while True:
+            w_new = w - t * step
+            z_new = Xa @ w_new
+            f_new = loss(w_new, z_new)
+            if f_new <= f - 1e-4 * t * (grad @ step) or t < 1e-10:
+                break
+            t *= 0.5
+        w, z, f = w_new, z_new, f_new
+        if np.abs(t * step).max() < tol:
+            break
+    else:
+        warnings.warn(f"newton_l2 did not converge in {max_iter} iterations (C={C})", ConvergenceWarning)
+    return w
+
+def run_path(penalty, l1_ratio, fold):
+    # jedna cesta přes CS na jednom foldu; warm start z předchozího C (liblinear ho ignoruje)
+    Xtr, ytr, Xte, yte = fold
+    if penalty == "l2":
+        Xa_tr, Xa_te = with_intercept(Xtr), with_intercept(Xte)
+        aucs, w = [], None
+        for C in CS:
+            w = newton_l2(Xa_tr, ytr, C, w)
+            aucs.append(roc_auc_score(yte, Xa_te @ w))
+        return aucs
+
+    extra = {"l1_ratio": l1_ratio} if penalty == "elasticnet" else {}
+    solver, max_iter = SOLVERS[penalty]
+    clf = LogisticRegression(penalty=penalty, solver=solver, max_iter=max_iter, warm_start=True, **extra)
+    aucs = []
+    for C in CS:
+        clf.set_params(C=C)
+        clf.fit(Xtr, ytr)
+        aucs.append(roc_auc_score(yte, clf.decision_function(Xte)))
+    return aucs
+
+paths = [(p, None) for p in PENALTIES if p != "elasticnet"]
+if "elasticnet" in PENALTIES:
+    paths += [("elasticnet", r) for r in L1_RATIOS]
+
+# solvery tráví čas v C/BLAS kódu bez GIL -> vlákna stačí a foldy se nekopírují do procesů
+res = Parallel(n_jobs=-1, prefer="threads")(
+    delayed(run_path)(penalty, l1_ratio, fold) for penalty, l1_ratio in paths for fold in folds
+)
+scores = np.asarray(res).reshape(len(paths), len(folds), len(CS)).mean(axis=1)
+
+i, j = np.unravel_index(np.argmax(scores), scores.shape)
+penalty, l1_ratio = paths[i]
+best_params = {"clf__C": CS[j], "clf__penalty": penalty}
+if penalty == "elasticnet":
+    best_params["clf__l1_ratio"] = l1_ratio
+
+print("best AUC:", scores[i, j])
+print("best params:", best_params)